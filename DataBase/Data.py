@@ -9,6 +9,13 @@ from typing import List, Optional, Dict, Any, Tuple
 from ExcelSup.Mapper import MATERIAL_TYPE_MAPPING
 
 
+def _format_date(value: Any) -> str:
+    """Formatuje datę z bazy (date/datetime/str) jako RRRR-MM-DD"""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10]
+
+
 @dataclass
 class MaterialLayer:
     """Warstwa materiału z grubością i typem"""
@@ -34,6 +41,19 @@ class ArticleData:
     tech: Optional[float]
     jm2: Optional[str]
     termin_zak: Optional[str]
+    first_sale: Optional[str] = None  # Pierwsza sprzedaż w okresie
+    sales_count: int = 0  # Liczba sprzedaży w okresie
+    sales_months: int = 0  # Liczba różnych miesięcy ze sprzedażą w okresie
+
+    @property
+    def sales_dates(self) -> Optional[str]:
+        """Skrócone podsumowanie dat sprzedaży do kolumny SALES_DATES"""
+        if self.sales_count:
+            return (f"{_format_date(self.first_sale)} – {_format_date(self.termin_zak)} "
+                    f"({self.sales_count} sprz., {self.sales_months} mies.)")
+        if self.termin_zak:
+            return f"Brak sprzedaży w okresie, ostatnia: {_format_date(self.termin_zak)}"
+        return None
 
     @property
     def layers(self) -> List[MaterialLayer]:
@@ -1,6 +1,7 @@
+import threading
 from abc import abstractmethod, ABC
 from datetime import date
-from typing import List, Dict
+from typing import List, Dict, Tuple, Any, Iterable
 
 from sqlalchemy import Engine, text
 
@@ -29,10 +30,15 @@ class SQLAlchemyRepository(DatabaseRepository):
         self.date_start = date_start
         self.date_end = date_end
 
-    def get_article_data(self, art_numbers: List[str]) -> Dict[str, ArticleData]:
+    def get_article_data(self, art_numbers: List[str],
+                         claimed_arts: Iterable[str] = ()) -> Dict[str, ArticleData]:
         """Pobiera dane artykułów z tabeli ZO:
         - sumuje TECH (ilości) w okresie Q4'24-Q3'25
-        - jeśli nie znaleziono, zapisuje tylko datę ostatniej sprzedaży spoza okresu
+        - w tym samym zapytaniu liczy podsumowanie dat sprzedaży (pierwsza, ostatnia,
+          liczba sprzedaży, liczba miesięcy) do kolumny SALES_DATES
+        - jeśli nie znaleziono, zapisuje tylko datę ostatniej sprzedaży przed okresem
+        claimed_arts - numery z dokładnym trafieniem w okresie pobrane wcześniej (cache);
+                       ich wiersze nie są przypisywane innym numerom przez LIKE
         """
         if not art_numbers:
             return {}
@@ -64,7 +70,10 @@ class SQLAlchemyRepository(DatabaseRepository):
                     MAX(RECEPTURA_1) AS RECEPTURA_1,
                     SUM(TECH) AS SUM_TECH,               -- 🔹 sumowanie ilości
                     MAX(JM2) AS JM2,
-                    MAX(DATA_SPRZ) AS LAST_DATE           -- 🔹 ostatnia sprzedaż w okresie
+                    MAX(DATA_SPRZ) AS LAST_DATE,          -- 🔹 ostatnia sprzedaż w okresie
+                    MIN(DATA_SPRZ) AS FIRST_DATE,         -- 🔹 pierwsza sprzedaż w okresie
+                    COUNT(*) AS SALES_COUNT,
+                    COUNT(DISTINCT YEAR(DATA_SPRZ) * 100 + MONTH(DATA_SPRZ)) AS SALES_MONTHS
                 FROM ZO
                 WHERE ({where_clause})
                   AND DATA_SPRZ >= :date_start 
@@ -73,7 +82,8 @@ class SQLAlchemyRepository(DatabaseRepository):
             )
             SELECT 
                 ART, SZEROKOSC_1, GRUBOSC_11, GRUBOSC_21, GRUBOSC_31,
-                RECEPTURA_1, SUM_TECH, JM2, LAST_DATE
+                RECEPTURA_1, SUM_TECH, JM2, LAST_DATE,
+                FIRST_DATE, SALES_COUNT, SALES_MONTHS
             FROM ArticleSummary
         """)
 
@@ -83,30 +93,29 @@ class SQLAlchemyRepository(DatabaseRepository):
         with self.engine.connect() as conn:
             rows = conn.execute(query_in_period, params).fetchall()
 
-            for row in rows:
-                db_art = row[0]
-                matched_original = next((a for a in art_numbers if a in db_art or a == db_art), None)
-
-                if matched_original:
-                    found_arts.add(matched_original)
-                    result[matched_original] = ArticleData(
-                        art=db_art,
-                        szerokosc_1=row[1],
-                        grubosc_11=row[2],
-                        grubosc_21=row[3],
-                        grubosc_31=row[4],
-                        receptura_1=row[5],
-                        tech=row[6],  # teraz to suma TECH
-                        jm2=row[7],
-                        termin_zak=row[8]  # ostatnia sprzedaż z okresu
-                    )
+            for matched_original, row in self._match_rows(rows, art_numbers, claimed_arts).items():
+                found_arts.add(matched_original)
+                result[matched_original] = ArticleData(
+                    art=row[0],
+                    szerokosc_1=row[1],
+                    grubosc_11=row[2],
+                    grubosc_21=row[3],
+                    grubosc_31=row[4],
+                    receptura_1=row[5],
+                    tech=row[6],  # teraz to suma TECH
+                    jm2=row[7],
+                    termin_zak=row[8],  # ostatnia sprzedaż z okresu
+                    first_sale=row[9],
+                    sales_count=row[10],
+                    sales_months=row[11]
+                )
 
             # --- 2️⃣ Szukaj poza okresem – tylko ostatnia data ---
             missing_arts = [art for art in art_numbers if art not in found_arts]
 
             if missing_arts:
                 conditions_missing = []
-                params_missing = {'date_start': '2024-10-01'}
+                params_missing = {'date_start': self.date_start}
 
                 for i, art in enumerate(missing_arts):
                     param_exact = f'miss_exact_{i}'
@@ -129,25 +138,108 @@ class SQLAlchemyRepository(DatabaseRepository):
 
                 rows_before = conn.execute(query_before_period, params_missing).fetchall()
 
-                for row in rows_before:
-                    db_art = row[0]
-                    matched_original = next((a for a in missing_arts if a in db_art or a == db_art), None)
-
-                    if matched_original:
-                        result[matched_original] = ArticleData(
-                            art=db_art,
-                            szerokosc_1=None,
-                            grubosc_11=None,
-                            grubosc_21=None,
-                            grubosc_31=None,
-                            receptura_1=None,
-                            tech=None,
-                            jm2=None,
-                            termin_zak=row[1]
-                        )
+                for matched_original, row in self._match_rows(rows_before, missing_arts).items():
+                    result[matched_original] = ArticleData(
+                        art=row[0],
+                        szerokosc_1=None,
+                        grubosc_11=None,
+                        grubosc_21=None,
+                        grubosc_31=None,
+                        receptura_1=None,
+                        tech=None,
+                        jm2=None,
+                        termin_zak=row[1]
+                    )
 
         return result
 
+    @staticmethod
+    def _match_rows(rows, art_numbers: List[str], claimed_arts: Iterable[str] = ()) -> Dict[str, Any]:
+        """Przypisuje wiersze z bazy do szukanych numerów ART.
+
+        Dokładne trafienie (ART = numer) ma pierwszeństwo i nie jest nadpisywane.
+        Pozostałe wiersze (LIKE) trafiają do pierwszego numeru bez dokładnego trafienia,
+        więc wynik dokładnego trafienia nie zależy od reszty partii numerów.
+        Wiersze numerów z claimed_arts są traktowane jak dokładne trafienia spoza partii.
+        """
+        wanted = set(art_numbers)
+        claimed = set(claimed_arts)
+        exact = {row[0]: row for row in rows if row[0] in wanted}
+
+        matched = {}
+        for row in rows:
+            if row[0] in exact or row[0] in claimed:
+                continue
+            original = next((a for a in art_numbers if a not in exact and a in row[0]), None)
+            if original:
+                matched[original] = row
+
+        matched.update(exact)
+        return matched
+
     def close(self):
         """Zamyka połączenie z bazą"""
         self.engine.dispose()
+
+
+class ArticleCache:
+    """Współdzielony, bezpieczny wątkowo cache danych artykułów (klucz: okres + ART)"""
+
+    def __init__(self):
+        self._data: Dict[Tuple[str, str, str], ArticleData] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, date_start: str, date_end: str,
+                 art_numbers: List[str]) -> Tuple[Dict[str, ArticleData], List[str]]:
+        """Zwraca (znalezione w cache, brakujące)"""
+        found = {}
+        missing = []
+        with self._lock:
+            for art in art_numbers:
+                data = self._data.get((date_start, date_end, art))
+                if data is None:
+                    missing.append(art)
+                else:
+                    found[art] = data
+        return found, missing
+
+    def put_many(self, date_start: str, date_end: str, result: Dict[str, ArticleData]):
+        """Zapisuje wyniki zapytania"""
+        with self._lock:
+            for art, data in result.items():
+                self._data[(date_start, date_end, art)] = data
+
+    def clear(self):
+        """Czyści cache (np. po zakończeniu kolejki, żeby nie serwować nieaktualnych danych)"""
+        with self._lock:
+            self._data.clear()
+
+
+class CachedRepository(DatabaseRepository):
+    """Dekorator repozytorium - pyta bazę tylko o artykuły spoza współdzielonego cache.
+
+    Cache'owane są wyłącznie dokładne trafienia z okresu (ART = numer, sprzedaż w okresie) -
+    tylko one nie zależą od pozostałych numerów w partii. Numery dopasowane przez LIKE,
+    ze sprzedażą sprzed okresu lub nieznalezione są pobierane za każdym razem.
+    """
+
+    def __init__(self, repository: SQLAlchemyRepository, cache: ArticleCache):
+        self.repository = repository
+        self.cache = cache
+
+    def get_article_data(self, art_numbers: List[str]) -> Dict[str, ArticleData]:
+        date_start, date_end = self.repository.date_start, self.repository.date_end
+        result, missing = self.cache.get_many(date_start, date_end, art_numbers)
+
+        if missing:
+            fetched = self.repository.get_article_data(missing, claimed_arts=result.keys())
+            self.cache.put_many(date_start, date_end, {
+                art: data for art, data in fetched.items() if data.art == art and data.sales_count
+            })
+            result.update(fetched)
+
+        return result
+
+    def close(self):
+        """Zamyka połączenie z bazą"""
+        self.repository.close()
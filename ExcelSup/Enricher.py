@@ -3,6 +3,33 @@ import pandas as pd
 from DataBase.Repository import DatabaseRepository
 
 
+# Kolumny dopisywane do Excela (kolejność = kolejność w pliku wynikowym)
+ENRICHED_COLUMNS = [
+    # Dane bazowe
+    'SZEROKOSC_1',
+    'GRUBOSC_11',
+    'GRUBOSC_21',
+    'GRUBOSC_31',
+    'RECEPTURA_1',
+    'TECH',
+    'JM2',
+    'TOTAL_THICKNESS',
+    'SALES_DATES',
+    # Material Type 1 (Kolumny I, J, K)
+    'Material_type_1',
+    'Material_1_proportion_%',
+    'Material_1_contact',
+    # Material Type 2 (Kolumny M, N, O)
+    'Material_type_2',
+    'Material_2_proportion_%',
+    'Material_2_contact',
+    # Material Type 3 (Kolumny Q, R, S)
+    'Material_type_3',
+    'Material_3_proportion_%',
+    'Material_3_contact',
+]
+
+
 class DataEnricher:
     """
     Service odpowiedzialny za wzbogacanie danych (Single Responsibility Principle)
@@ -23,31 +50,9 @@ class DataEnricher:
         # Pobierz dane z bazy
         article_data = self.repository.get_article_data(unique_items)
 
-        # Przygotuj kolumny dla danych bazowych
-        df['SZEROKOSC_1'] = None
-        df['GRUBOSC_11'] = None
-        df['GRUBOSC_21'] = None
-        df['GRUBOSC_31'] = None
-        df['RECEPTURA_1'] = None
-        df['TECH'] = None
-        df['JM2'] = None
-        df['TOTAL_THICKNESS'] = None
-        df['SALES_DATES'] = None
-
-        # Kolumny dla Material Type 1 (Kolumny I, J, K)
-        df['Material_type_1'] = None
-        df['Material_1_proportion_%'] = None
-        df['Material_1_contact'] = None
-
-        # Kolumny dla Material Type 2 (Kolumny M, N, O)
-        df['Material_type_2'] = None
-        df['Material_2_proportion_%'] = None
-        df['Material_2_contact'] = None
-
-        # Kolumny dla Material Type 3 (Kolumny Q, R, S)
-        df['Material_type_3'] = None
-        df['Material_3_proportion_%'] = None
-        df['Material_3_contact'] = None
+        # Przygotuj kolumny dla danych bazowych i materiałów
+        for column in ENRICHED_COLUMNS:
+            df[column] = None
 
         # Wypełnij dane
         for idx, row in df.iterrows():
@@ -67,6 +72,7 @@ class DataEnricher:
                 df.at[idx, 'TECH'] = data.tech
                 df.at[idx, 'JM2'] = data.jm2
                 df.at[idx, 'TOTAL_THICKNESS'] = data.total_thickness
+                df.at[idx, 'SALES_DATES'] = data.sales_dates
 
                 # Warstwy z proporcjami
                 layer_proportions = data.get_layer_proportions()
@@ -1,10 +1,11 @@
 from pathlib import Path
 from typing import Optional
 
+import pandas as pd
 from sqlalchemy import Engine
 
-from DataBase.Repository import SQLAlchemyRepository
-from ExcelSup.Enricher import DataEnricher
+from DataBase.Repository import SQLAlchemyRepository, ArticleCache, CachedRepository
+from ExcelSup.Enricher import DataEnricher, ENRICHED_COLUMNS
 from ExcelSup.Processor import ExcelProcessor
 
 
@@ -13,15 +14,25 @@ class ExcelEnrichmentFacade:
     Facade Pattern - upraszcza interfejs dla klienta
     """
 
-    def __init__(self, engine: Engine, date_start: str = '2024-10-01', date_end: str = '2025-09-30'):
+    def __init__(self, engine: Engine, date_start: str = '2024-10-01', date_end: str = '2025-09-30',
+                 article_cache: Optional[ArticleCache] = None, dispose_engine: bool = True):
+        """
+        article_cache - współdzielony cache artykułów (np. między zadaniami z kolejki)
+        dispose_engine - False, gdy silnik jest współdzielony i nie może być zamknięty po pliku
+        """
         self.repository = SQLAlchemyRepository(engine, date_start, date_end)
+        if article_cache is not None:
+            self.repository = CachedRepository(self.repository, article_cache)
         self.enricher = DataEnricher(self.repository)
         self.date_start = date_start
         self.date_end = date_end
+        self.dispose_engine = dispose_engine
 
-    def process_file(self, input_path: str, output_path: Optional[str] = None):
+    def process_file(self, input_path: str, output_path: Optional[str] = None, append_only: bool = False):
         """
         Główna metoda do przetwarzania pliku Excel
+        append_only - dopisuje tylko nowe kolumny do oryginalnego arkusza
+                      (zachowuje formatowanie, formuły i pozostałe arkusze)
         """
         try:
             # Wczytaj Excel
@@ -42,7 +53,10 @@ class ExcelEnrichmentFacade:
 
             # Zapisz wynik
             output = Path(output_path) if output_path else None
-            processor.save(output)
+            if append_only:
+                processor.save_appended(ENRICHED_COLUMNS, output)
+            else:
+                processor.save(output)
 
             print(f"✅ Przetworzono pomyślnie!")
             print(f"💾 Zapisano do: {output_path or input_path}")
@@ -52,4 +66,22 @@ class ExcelEnrichmentFacade:
             print(f"📦 Znaleziono dane dla {materials_found} artykułów")
 
         finally:
-            self.repository.close()
\ No newline at end of file
+            if self.dispose_engine:
+                self.repository.close()
+
+    def preview_file(self, input_path: str, n_rows: int = 20) -> pd.DataFrame:
+        """
+        Szybki podgląd - wczytuje i wzbogaca tylko pierwsze n_rows wierszy, bez zapisu
+        """
+        try:
+            processor = ExcelProcessor(Path(input_path))
+            processor.load(nrows=n_rows)
+
+            return self.enricher.enrich_dataframe(
+                processor.df,
+                purchase_item_col='Purchase item number'
+            )
+
+        finally:
+            if self.dispose_engine:
+                self.repository.close()
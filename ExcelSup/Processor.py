@@ -3,6 +3,8 @@ from typing import Optional, List
 
 import pandas as pd
 
+from ExcelSup.Writer import XlsxColumnAppender
+
 
 class ExcelProcessor:
     """
@@ -13,10 +15,12 @@ class ExcelProcessor:
         self.file_path = file_path
         self.purchase_item_column = purchase_item_column
         self.df: Optional[pd.DataFrame] = None
+        self.source_columns: List[str] = []  # Kolumny wczytane z pliku (przed wzbogaceniem)
 
-    def load(self) -> 'ExcelProcessor':
-        """Wczytuje plik Excel"""
-        self.df = pd.read_excel(self.file_path)
+    def load(self, nrows: Optional[int] = None) -> 'ExcelProcessor':
+        """Wczytuje plik Excel (nrows - tylko pierwsze N wierszy danych, np. do podglądu)"""
+        self.df = pd.read_excel(self.file_path, nrows=nrows)
+        self.source_columns = [str(column) for column in self.df.columns]
         return self
 
     def get_purchase_items(self) -> List[str]:
@@ -36,4 +40,30 @@ class ExcelProcessor:
             raise ValueError("DataFrame not loaded")
 
         path = output_path or self.file_path
-        self.df.to_excel(path, index=False)
\ No newline at end of file
+        self.df.to_excel(path, index=False)
+
+    def save_appended(self, columns: List[str], output_path: Optional[Path] = None):
+        """Dopisuje tylko wskazane kolumny do oryginalnego arkusza - reszta pliku bez zmian"""
+        if self.df is None:
+            raise ValueError("DataFrame not loaded")
+
+        if self.file_path.suffix.lower() not in ('.xlsx', '.xlsm'):
+            # Stary format .xls nie jest archiwum XML - pełny zapis
+            self.save(output_path)
+            return
+
+        path = Path(output_path or self.file_path)
+        if path.suffix.lower() != self.file_path.suffix.lower():
+            # Zawartość .xlsm pod nazwą .xlsx (i odwrotnie) nie otworzy się w Excelu
+            raise ValueError(
+                f"Plik wyjściowy musi mieć to samo rozszerzenie co wejściowy ({self.file_path.suffix})"
+            )
+
+        existing = [column for column in columns if column in self.source_columns]
+        if existing:
+            raise ValueError(
+                f"Plik zawiera już kolumny {', '.join(existing)} (np. wynik wcześniejszego przetwarzania) - "
+                f"dopisanie utworzyłoby duplikaty. Przetwórz go bez trybu dopisywania."
+            )
+
+        XlsxColumnAppender(self.file_path).append(self.df[columns], path)
\ No newline at end of file
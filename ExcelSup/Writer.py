@@ -0,0 +1,349 @@
+import codecs
+import math
+import os
+import posixpath
+import re
+import shutil
+import tempfile
+import zipfile
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator, List, Tuple, Dict, Any, Optional
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+
+_CHUNK_SIZE = 1 << 20
+_MAX_COLUMNS = 16384  # Limit kolumn Excela (XFD)
+
+_ROW_START = re.compile(r'<(\w+:)?row[\s/>]')
+_ROW_END = re.compile(r'</(?:\w+:)?row>')
+_ROW_NUMBER = re.compile(r'\sr="(\d+)"')
+_ROW_SPANS = re.compile(r'(\sspans=")(\d+):(\d+)(")')
+_CELL = re.compile(r'<(?:\w+:)?c\b([^>]*)>')
+_CELL_REF = re.compile(r'\sr="([A-Z]+)\d+"')
+_SHEET_DATA_END = re.compile(r'</(\w+:)?sheetData>|<(\w+:)?sheetData\s*/>')
+_DIMENSION = re.compile(r'(<(?:\w+:)?dimension\s+ref=")(?:([A-Z]+\d+):)?([A-Z]+)(\d+)(")')
+_ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+class _StaleDimension(Exception):
+    """<dimension> arkusza nie obejmuje wszystkich komórek - potrzebne pełne skanowanie"""
+
+
+def column_letter(index: int) -> str:
+    """Numer kolumny (1 = A) -> litera kolumny Excela"""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def column_index(letters: str) -> int:
+    """Litera kolumny Excela -> numer kolumny (A = 1)"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index
+
+
+class XlsxColumnAppender:
+    """
+    Dopisuje kolumny na końcu pierwszego arkusza pliku .xlsx bez przebudowy skoroszytu.
+
+    XML arkusza jest czytany strumieniowo wiersz po wierszu, a nowe komórki
+    (inlineStr / liczby) są wklejane przed </row>. Pozostałe komórki, formatowanie,
+    formuły i inne arkusze zostają skopiowane bez zmian.
+
+    Wiersze mapowane są tak jak w pd.read_excel: nagłówek w wierszu 1,
+    wiersz i DataFrame w wierszu i + 2 (puste wiersze arkusza też się liczą).
+
+    Ostatnią kolumnę bierzemy z <dimension ref>, a poprawność sprawdzamy w trakcie
+    zapisu; gdy jest nieaktualny, arkusz jest skanowany i zapisywany ponownie.
+    Czas zapisu nadal rośnie z rozmiarem arkusza (jedno przejście po jego XML),
+    a pozostałe elementy archiwum są przepakowywane tą samą metodą kompresji -
+    zipfile nie pozwala kopiować skompresowanych danych bez rozpakowania.
+    """
+
+    def __init__(self, source_path: Path):
+        self.source_path = source_path
+
+    def append(self, columns: pd.DataFrame, output_path: Path):
+        """Dopisuje kolumny DataFrame (nagłówek + wiersze danych) do arkusza"""
+        with zipfile.ZipFile(self.source_path) as zin:
+            sheet_path = self._first_sheet_path(zin)
+
+            new_cells = {1: list(columns.columns)}
+            for offset, values in enumerate(columns.itertuples(index=False)):
+                new_cells[offset + 2] = list(values)
+
+            last_column = self._dimension_last_column(zin, sheet_path)
+            if last_column is not None:
+                try:
+                    self._write_archive(zin, sheet_path, new_cells, last_column, output_path)
+                    return
+                except _StaleDimension:
+                    pass
+
+            last_column = self._scan_last_column(zin, sheet_path)
+            self._write_archive(zin, sheet_path, new_cells, last_column, output_path)
+
+    def _write_archive(self, zin: zipfile.ZipFile, sheet_path: str, new_cells: Dict[int, List[Any]],
+                       last_column: int, output_path: Path):
+        """Kopiuje archiwum z podmienionym arkuszem - elementy zachowują metodę kompresji"""
+        first_new_column = last_column + 1
+        new_last_column = last_column + len(new_cells[1])
+        if new_last_column > _MAX_COLUMNS:
+            raise ValueError(
+                f"Brak miejsca na nowe kolumny: arkusz używa kolumn do {column_letter(last_column)} "
+                f"(np. formatowanie całych wierszy), a Excel dopuszcza najwyżej "
+                f"{column_letter(_MAX_COLUMNS)}. Usuń formatowanie pustych kolumn "
+                f"lub zapisz bez trybu dopisywania."
+            )
+
+        # Zapis do pliku tymczasowego - output_path może być plikiem źródłowym
+        fd, tmp_path = tempfile.mkstemp(suffix=Path(output_path).suffix, dir=Path(output_path).parent)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, 'w') as zout:
+                for info in zin.infolist():
+                    target = zipfile.ZipInfo(info.filename, info.date_time)
+                    target.compress_type = info.compress_type
+                    target.external_attr = info.external_attr
+
+                    with zin.open(info) as src, zout.open(target, 'w') as dst:
+                        if info.filename == sheet_path:
+                            self._write_sheet(src, dst, new_cells, first_new_column, new_last_column)
+                        else:
+                            shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _first_sheet_path(zin: zipfile.ZipFile) -> str:
+        """Ścieżka w archiwum do pierwszego arkusza (ten sam, który czyta pd.read_excel)"""
+        workbook = ElementTree.fromstring(zin.read('xl/workbook.xml'))
+        first_sheet = workbook.find(f'{_NS_MAIN}sheets/{_NS_MAIN}sheet')
+        if first_sheet is None:
+            raise ValueError("Skoroszyt nie zawiera arkuszy")
+        rel_id = first_sheet.get(f'{_NS_REL}id')
+
+        rels = ElementTree.fromstring(zin.read('xl/_rels/workbook.xml.rels'))
+        for rel in rels.iter(f'{_NS_PKG_REL}Relationship'):
+            if rel.get('Id') == rel_id:
+                target = rel.get('Target')
+                if target.startswith('/'):
+                    return target.lstrip('/')
+                return posixpath.normpath(posixpath.join('xl', target))
+
+        raise ValueError(f"Nie znaleziono arkusza o identyfikatorze {rel_id}")
+
+    @staticmethod
+    def _dimension_last_column(zin: zipfile.ZipFile, sheet_path: str) -> Optional[int]:
+        """Ostatnia kolumna z <dimension ref> (przed <sheetData>) - None, gdy go brak"""
+        with zin.open(sheet_path) as stream:
+            for is_row, part in _iter_sheet_parts(stream):
+                match = None if is_row else _DIMENSION.search(part)
+                if match:
+                    return column_index(match.group(3))
+                if is_row or 'sheetData' in part:
+                    return None
+        return None
+
+    def _scan_last_column(self, zin: zipfile.ZipFile, sheet_path: str) -> int:
+        """Pełne skanowanie: ostatnia kolumna z jakąkolwiek komórką (także tylko ze stylem)"""
+        last_column = 0
+
+        with zin.open(sheet_path) as stream:
+            for is_row, part in _iter_sheet_parts(stream):
+                if is_row:
+                    last_column = max(last_column, _row_last_column(part))
+
+        return last_column
+
+    def _write_sheet(self, src, dst, new_cells: Dict[int, List[Any]],
+                     first_new_column: int, new_last_column: int):
+        """Drugie przejście: kopiuje XML arkusza, wklejając nowe komórki w wybranych wierszach"""
+        encoder = codecs.getincrementalencoder('utf-8')()
+        pending = sorted(new_cells)
+        next_pending = 0
+        row_number = 0
+
+        for is_row, part in _iter_sheet_parts(src):
+            if is_row:
+                if _row_last_column(part) >= first_new_column:
+                    raise _StaleDimension()
+
+                row_number = _row_number(part, row_number)
+                prefix = _ROW_START.match(part).group(1) or ''
+
+                # Wiersze bez elementu <row> w XML (puste) - dokładamy nowe przed bieżącym
+                missing = []
+                while next_pending < len(pending) and pending[next_pending] < row_number:
+                    number = pending[next_pending]
+                    missing.append(_new_row(prefix, number, new_cells[number], first_new_column))
+                    next_pending += 1
+
+                if next_pending < len(pending) and pending[next_pending] == row_number:
+                    part = _splice_row(part, row_number, new_cells[row_number],
+                                       first_new_column, new_last_column)
+                    next_pending += 1
+                part = ''.join(missing) + part
+            else:
+                part = _DIMENSION.sub(
+                    lambda m: (f'{m.group(1)}{m.group(2) or m.group(3) + m.group(4)}:'
+                               f'{column_letter(max(column_index(m.group(3)), new_last_column))}'
+                               f'{max(int(m.group(4)), pending[-1])}{m.group(5)}'),
+                    part
+                )
+
+                # Pozostałe wiersze za ostatnim istniejącym - przed </sheetData>
+                end = _SHEET_DATA_END.search(part)
+                if end and next_pending < len(pending):
+                    prefix = end.group(1) or end.group(2) or ''
+                    rows = ''.join(_new_row(prefix, number, new_cells[number], first_new_column)
+                                   for number in pending[next_pending:])
+                    next_pending = len(pending)
+                    if end.group(0).endswith('/>'):
+                        rows = f'<{prefix}sheetData>{rows}</{prefix}sheetData>'
+                    else:
+                        rows += end.group(0)
+                    part = part[:end.start()] + rows + part[end.end():]
+
+            dst.write(encoder.encode(part))
+        dst.write(encoder.encode('', final=True))
+
+
+def _iter_sheet_parts(stream) -> Iterator[Tuple[bool, str]]:
+    """Dzieli strumień XML arkusza na (czy_wiersz, tekst) bez budowania drzewa DOM"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    while True:
+        match = _ROW_START.search(buffer, pos)
+
+        if match:
+            if match.start() > pos:
+                yield False, buffer[pos:match.start()]
+                pos = match.start()
+
+            row_end = None
+            tag_end = buffer.find('>', pos)
+            if tag_end != -1:
+                if buffer[tag_end - 1] == '/':
+                    row_end = tag_end + 1
+                else:
+                    end = _ROW_END.search(buffer, tag_end)
+                    if end:
+                        row_end = end.end()
+
+            if row_end is not None:
+                yield True, buffer[pos:row_end]
+                pos = row_end
+                continue
+        else:
+            # Tekst kończymy zawsze przed początkiem tagu, aby żaden tag nie był rozcięty
+            cut = buffer.rfind('<', pos)
+            if cut == -1:
+                cut = len(buffer)
+            if cut > pos:
+                yield False, buffer[pos:cut]
+                pos = cut
+
+        if eof:
+            if match:
+                raise ValueError("Niekompletny element <row> w XML arkusza")
+            if pos < len(buffer):
+                yield False, buffer[pos:]
+            return
+
+        chunk = stream.read(_CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + decoder.decode(chunk, final=eof)
+        pos = 0
+
+
+def _row_last_column(row: str) -> int:
+    """Ostatnia kolumna z komórką w wierszu - komórki są uporządkowane, więc wystarcza ostatnia"""
+    prefix = _ROW_START.match(row).group(1) or ''
+    last_cell = row.rfind(f'<{prefix}c ')
+    if last_cell != -1:
+        ref = _CELL_REF.search(row, last_cell, row.find('>', last_cell) + 1)
+        if ref:
+            return column_index(ref.group(1))
+
+    # Komórki bez atrybutu r (opcjonalny w specyfikacji) - liczymy po kolei
+    last_column = 0
+    for cell in _CELL.finditer(row):
+        ref = _CELL_REF.search(cell.group(1))
+        last_column = column_index(ref.group(1)) if ref else last_column + 1
+    return last_column
+
+
+def _row_number(row: str, previous: int) -> int:
+    """Numer wiersza z atrybutu r (opcjonalny w specyfikacji - wtedy poprzedni + 1)"""
+    match = _ROW_NUMBER.search(row[:row.find('>')])
+    return int(match.group(1)) if match else previous + 1
+
+
+def _splice_row(row: str, row_number: int, values: List[Any],
+                first_new_column: int, new_last_column: int) -> str:
+    """Wkleja nowe komórki przed zamknięciem wiersza i poszerza atrybut spans"""
+    prefix = _ROW_START.match(row).group(1) or ''
+    cells = _cells_xml(prefix, row_number, values, first_new_column)
+
+    tag_end = row.find('>') + 1
+    start_tag = _ROW_SPANS.sub(
+        lambda m: f'{m.group(1)}{m.group(2)}:{max(int(m.group(3)), new_last_column)}{m.group(4)}',
+        row[:tag_end]
+    )
+
+    if start_tag.endswith('/>'):
+        return f'{start_tag[:-2]}>{cells}</{prefix}row>'
+    close_at = row.rfind('</')
+    return start_tag + row[tag_end:close_at] + cells + row[close_at:]
+
+
+def _cells_xml(prefix: str, row_number: int, values: List[Any], first_new_column: int) -> str:
+    """Komórki XML dla kolejnych kolumn od first_new_column"""
+    return ''.join(
+        _cell_xml(prefix, f'{column_letter(first_new_column + offset)}{row_number}', value)
+        for offset, value in enumerate(values)
+    )
+
+
+def _new_row(prefix: str, row_number: int, values: List[Any], first_new_column: int) -> str:
+    """Nowy element <row> dla wiersza, którego nie było w XML (pomija wiersze bez wartości)"""
+    cells = _cells_xml(prefix, row_number, values, first_new_column)
+    return f'<{prefix}row r="{row_number}">{cells}</{prefix}row>' if cells else ''
+
+
+def _cell_xml(prefix: str, ref: str, value: Any) -> str:
+    """Komórka XML: liczby jako <v>, tekst jako inlineStr (bez zmian w sharedStrings)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+
+    if hasattr(value, 'item'):  # typy numpy -> typy Pythona
+        value = value.item()
+
+    if isinstance(value, bool):
+        return f'<{prefix}c r="{ref}" t="b"><{prefix}v>{int(value)}</{prefix}v></{prefix}c>'
+    if isinstance(value, (int, float, Decimal)):
+        if not math.isfinite(value):
+            return ''
+        return f'<{prefix}c r="{ref}"><{prefix}v>{value}</{prefix}v></{prefix}c>'
+
+    text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)), {'"': '&quot;'})
+    return (f'<{prefix}c r="{ref}" t="inlineStr"><{prefix}is>'
+            f'<{prefix}t xml:space="preserve">{text}</{prefix}t></{prefix}is></{prefix}c>')
@@ -0,0 +1,69 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+from sqlalchemy import Engine
+
+from DataBase.Repository import ArticleCache
+from ExcelSup.Facade import ExcelEnrichmentFacade
+
+
+# Statusy zadań w kolejce
+STATUS_QUEUED = "⏸️ W kolejce"
+STATUS_RUNNING = "⏳ W toku"
+STATUS_DONE = "✅ Zakończone"
+STATUS_FAILED = "❌ Błąd"
+
+
+@dataclass
+class Job:
+    """Pojedyncze zadanie w kolejce: plik + zakres dat"""
+    job_id: int
+    input_file: str
+    output_file: str
+    date_start: str
+    date_end: str
+    append_only: bool = False  # Dopisz tylko nowe kolumny do oryginalnego arkusza
+    status: str = STATUS_QUEUED
+    message: str = ""
+    elapsed: Optional[float] = None  # Czas przetwarzania w sekundach
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (STATUS_DONE, STATUS_FAILED)
+
+
+class JobSignals(QObject):
+    """Sygnały zadania (QRunnable nie dziedziczy po QObject)"""
+    started = pyqtSignal(int)
+    finished = pyqtSignal(int, bool, str, float)
+
+
+class ProcessingJob(QRunnable):
+    """Zadanie uruchamiane w puli wątków - współdzieli silnik i cache artykułów"""
+
+    def __init__(self, job: Job, engine: Engine, article_cache: ArticleCache):
+        super().__init__()
+        self.job = job
+        self.engine = engine
+        self.article_cache = article_cache
+        self.signals = JobSignals()
+
+    def run(self):
+        start = time.perf_counter()
+        self.signals.started.emit(self.job.job_id)
+        try:
+            facade = ExcelEnrichmentFacade(
+                self.engine,
+                self.job.date_start,
+                self.job.date_end,
+                article_cache=self.article_cache,
+                dispose_engine=False  # Silnik należy do okna i jest współdzielony
+            )
+            facade.process_file(self.job.input_file, self.job.output_file, self.job.append_only)
+            self.signals.finished.emit(self.job.job_id, True, "Przetwarzanie zakończone pomyślnie!",
+                                       time.perf_counter() - start)
+        except Exception as e:
+            self.signals.finished.emit(self.job.job_id, False, f"Błąd: {str(e)}",
+                                       time.perf_counter() - start)
@@ -1,35 +1,50 @@
+import time
 from pathlib import Path
+from typing import Dict, Optional
 
+import pandas as pd
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QLineEdit, QDateEdit, QTextEdit, QFileDialog,
-    QGroupBox, QMessageBox
+    QGroupBox, QMessageBox, QSpinBox, QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt6.QtCore import QDate, QThread, pyqtSignal
+from PyQt6.QtCore import QDate, QThread, QThreadPool, pyqtSignal
+from sqlalchemy import Engine
 
+from DataBase.Repository import ArticleCache
 from ExcelSup.Facade import ExcelEnrichmentFacade
+from GUI.JobQueue import Job, ProcessingJob, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED, STATUS_QUEUED
 from config import getEngine
 
 
-class ProcessingThread(QThread):
-    """Worker thread do przetwarzania w tle"""
-    finished = pyqtSignal(bool, str)
+def suggest_output_file(input_file: str, date_start: str, date_end: str) -> str:
+    """Proponowana nazwa pliku wyjściowego obok wejściowego - z zakresem dat, by zadania się nie nadpisywały"""
+    path = Path(input_file)
+    return str(path.parent / f"{path.stem}_enriched_{date_start}_{date_end}{path.suffix}")
 
-    def __init__(self, input_file, output_file, date_start, date_end):
+
+class PreviewThread(QThread):
+    """Worker thread do podglądu pierwszych N wierszy (bez zapisu pliku)"""
+    finished = pyqtSignal(bool, object, str)
+
+    def __init__(self, input_file, date_start, date_end, n_rows, engine):
         super().__init__()
         self.input_file = input_file
-        self.output_file = output_file
         self.date_start = date_start
         self.date_end = date_end
+        self.n_rows = n_rows
+        self.engine = engine
 
     def run(self):
+        start = time.perf_counter()
         try:
-            engine = getEngine()
-            facade = ExcelEnrichmentFacade(engine, self.date_start, self.date_end)
-            facade.process_file(self.input_file, self.output_file)
-            self.finished.emit(True, "Przetwarzanie zakończone pomyślnie!")
+            # Bez cache kolejki - podgląd nie może wpływać na wyniki pełnego przetwarzania
+            facade = ExcelEnrichmentFacade(self.engine, self.date_start, self.date_end,
+                                           dispose_engine=False)
+            df = facade.preview_file(self.input_file, self.n_rows)
+            self.finished.emit(True, df, f"Podgląd {len(df)} wierszy gotowy ({time.perf_counter() - start:.2f} s)")
         except Exception as e:
-            self.finished.emit(False, f"Błąd: {str(e)}")
+            self.finished.emit(False, None, f"Błąd podglądu: {str(e)}")
 
 
 class MainWindow(QMainWindow):
@@ -39,12 +54,22 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.input_file = ""
         self.output_file = ""
-        self.processing_thread = None
+        self.output_file_suggested = False  # Nazwa wyjściowa zaproponowana automatycznie (z zakresem dat)
+        # Kolejka zadań - wspólna pula wątków, silnik i cache artykułów
+        self.jobs: Dict[int, Job] = {}
+        self.running_jobs: Dict[int, ProcessingJob] = {}
+        self.next_job_id = 1
+        self.engine: Optional[Engine] = None
+        self.article_cache = ArticleCache()  # Czyszczony, gdy kolejka się opróżni
+        self.thread_pool = QThreadPool()
+        self.preview_thread = None
+        self.preview_running = False
+        self.closing = False  # Zamknięcie potwierdzone - czekamy na trwające zadania
         self.init_ui()
 
     def init_ui(self):
         self.setWindowTitle("Excel Supplement - Uzupełnianie danych o materiałach")
-        self.setGeometry(100, 100, 800, 700)
+        self.setGeometry(100, 100, 1000, 950)
 
         # Centralny widget
         central_widget = QWidget()
@@ -106,8 +131,13 @@ Program automatycznie utworzy nowy plik Excel i doda kolumny z danymi materiał
         output_layout.addWidget(self.output_file_edit)
         output_layout.addWidget(output_browse_btn)
 
+        self.append_only_check = QCheckBox(
+            "Dopisz tylko nowe kolumny (zachowaj formatowanie, formuły i pozostałe arkusze)"
+        )
+
         files_layout.addLayout(input_layout)
         files_layout.addLayout(output_layout)
+        files_layout.addWidget(self.append_only_check)
         files_group.setLayout(files_layout)
         main_layout.addWidget(files_group)
 
@@ -127,6 +157,9 @@ Program automatycznie utworzy nowy plik Excel i doda kolumny z danymi materiał
         self.end_date_edit.setDate(QDate(2025, 9, 30))  # Q3 2025
         self.end_date_edit.setDisplayFormat("yyyy-MM-dd")
 
+        self.start_date_edit.dateChanged.connect(self.update_suggested_output)
+        self.end_date_edit.dateChanged.connect(self.update_suggested_output)
+
 
         dates_layout.addWidget(start_label)
         dates_layout.addWidget(self.start_date_edit)
@@ -140,7 +173,14 @@ Program automatycznie utworzy nowy plik Excel i doda kolumny z danymi materiał
         # === SEKCJA 4: Przyciski akcji ===
         action_layout = QHBoxLayout()
 
-        self.process_btn = QPushButton("▶️ Przetwórz plik")
+        concurrency_label = QLabel("Równoległe zadania:")
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 8)
+        self.concurrency_spin.setValue(3)
+        self.concurrency_spin.valueChanged.connect(self.thread_pool.setMaxThreadCount)
+        self.thread_pool.setMaxThreadCount(self.concurrency_spin.value())
+
+        self.process_btn = QPushButton("▶️ Dodaj do kolejki")
         self.process_btn.setStyleSheet("""
             QPushButton {
                 background-color: #4CAF50;
@@ -159,22 +199,79 @@ Program automatycznie utworzy nowy plik Excel i doda kolumny z danymi materiał
         """)
         self.process_btn.clicked.connect(self.process_file)
 
+        self.add_files_btn = QPushButton("📂 Dodaj pliki...")
+        self.add_files_btn.clicked.connect(self.add_files_to_queue)
+
         cancel_btn = QPushButton("❌ Zamknij")
         cancel_btn.clicked.connect(self.close)
 
+        action_layout.addWidget(concurrency_label)
+        action_layout.addWidget(self.concurrency_spin)
         action_layout.addStretch()
+        action_layout.addWidget(self.add_files_btn)
         action_layout.addWidget(self.process_btn)
         action_layout.addWidget(cancel_btn)
 
         main_layout.addLayout(action_layout)
 
-        # === SEKCJA 5: Status ===
+        # === SEKCJA 5: Kolejka zadań ===
+        queue_group = QGroupBox("🗂️ Kolejka zadań")
+        queue_layout = QVBoxLayout()
+
+        self.queue_table = QTableWidget(0, 5)
+        self.queue_table.setHorizontalHeaderLabels(
+            ["Plik wejściowy", "Plik wyjściowy", "Zakres dat", "Status", "Czas [s]"]
+        )
+        self.queue_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.queue_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.queue_table.verticalHeader().setVisible(False)
+        header = self.queue_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        for column in (2, 3, 4):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+
+        clear_btn = QPushButton("🧹 Usuń zakończone")
+        clear_btn.clicked.connect(self.clear_finished_jobs)
+        clear_layout = QHBoxLayout()
+        clear_layout.addStretch()
+        clear_layout.addWidget(clear_btn)
+
+        queue_layout.addWidget(self.queue_table)
+        queue_layout.addLayout(clear_layout)
+        queue_group.setLayout(queue_layout)
+        main_layout.addWidget(queue_group)
+
+        # === SEKCJA 6: Podgląd ===
+        preview_group = QGroupBox("🔍 Podgląd (bez zapisu pliku)")
+        preview_layout = QVBoxLayout()
+
+        preview_controls = QHBoxLayout()
+        preview_rows_label = QLabel("Liczba wierszy:")
+        self.preview_rows_spin = QSpinBox()
+        self.preview_rows_spin.setRange(1, 500)
+        self.preview_rows_spin.setValue(20)
+        self.preview_btn = QPushButton("🔍 Podgląd")
+        self.preview_btn.clicked.connect(self.preview_file)
+
+        preview_controls.addWidget(preview_rows_label)
+        preview_controls.addWidget(self.preview_rows_spin)
+        preview_controls.addStretch()
+        preview_controls.addWidget(self.preview_btn)
+
+        self.preview_table = QTableWidget(0, 0)
+        self.preview_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+
+        preview_layout.addLayout(preview_controls)
+        preview_layout.addWidget(self.preview_table)
+        preview_group.setLayout(preview_layout)
+        main_layout.addWidget(preview_group)
+
+        # === SEKCJA 7: Status ===
         self.status_label = QLabel("Gotowy do pracy")
         self.status_label.setStyleSheet("padding: 10px; background-color: #e8f5e9; border-radius: 5px;")
         main_layout.addWidget(self.status_label)
 
-        main_layout.addStretch()
-
     def browse_input_file(self):
         """Wybór pliku wejściowego"""
         file_name, _ = QFileDialog.getOpenFileName(
@@ -188,11 +285,17 @@ Program automatycznie utworzy nowy plik Excel i doda kolumny z danymi materiał
             self.input_file_edit.setText(file_name)
 
             # Automatycznie zaproponuj nazwę wyjściową
-            if not self.output_file:
-                path = Path(file_name)
-                suggested_output = str(path.parent / f"{path.stem}_enriched{path.suffix}")
-                self.output_file = suggested_output
-                self.output_file_edit.setText(suggested_output)
+            if not self.output_file or self.output_file_suggested:
+                self.output_file_suggested = True
+                self.update_suggested_output()
+
+    def update_suggested_output(self):
+        """Odśwież zaproponowaną nazwę wyjściową po zmianie pliku lub zakresu dat"""
+        if not self.input_file or not self.output_file_suggested:
+            return
+        date_start, date_end = self.get_date_range()
+        self.output_file = suggest_output_file(self.input_file, date_start, date_end)
+        self.output_file_edit.setText(self.output_file)
 
     def browse_output_file(self):
         """Wybór pliku wyjściowego"""
@@ -204,6 +307,7 @@ Program automatycznie utworzy nowy plik Excel i doda kolumny z danymi materiał
         )
         if file_name:
             self.output_file = file_name
+            self.output_file_suggested = False
             self.output_file_edit.setText(file_name)
 
     def validate_inputs(self) -> bool:
@@ -220,43 +324,255 @@ Program automatycznie utworzy nowy plik Excel i doda kolumny z danymi materiał
             QMessageBox.warning(self, "Błąd", "Plik wejściowy nie istnieje!")
             return False
 
+        if self.is_output_pending(self.output_file):
+            QMessageBox.warning(self, "Błąd", "Ten plik wyjściowy jest już w kolejce!")
+            return False
+
         return True
 
+    def is_output_pending(self, output_file: str) -> bool:
+        """Czy plik wyjściowy jest celem zadania, które jeszcze się nie zakończyło"""
+        return any(job.output_file == output_file and not job.is_finished for job in self.jobs.values())
+
+    def get_date_range(self):
+        """Zwraca wybrany zakres dat jako (date_start, date_end)"""
+        date_start = self.start_date_edit.date().toString("yyyy-MM-dd")
+        date_end = self.end_date_edit.date().toString("yyyy-MM-dd")
+        return date_start, date_end
+
+    def get_engine(self) -> Optional[Engine]:
+        """Tworzy (raz) silnik współdzielony przez wszystkie zadania"""
+        if self.engine is None:
+            try:
+                self.engine = getEngine()
+            except Exception as e:
+                QMessageBox.critical(self, "Błąd", f"Nie można połączyć z bazą: {str(e)}")
+                return None
+        return self.engine
+
     def process_file(self):
-        """Uruchom przetwarzanie pliku"""
+        """Dodaj wybrany plik i zakres dat do kolejki"""
         if not self.validate_inputs():
             return
 
-        # Pobierz daty
-        date_start = self.start_date_edit.date().toString("yyyy-MM-dd")
-        date_end = self.end_date_edit.date().toString("yyyy-MM-dd")
+        date_start, date_end = self.get_date_range()
+        self.enqueue_job(self.input_file, self.output_file, date_start, date_end)
 
-        # Wyłącz przycisk
-        self.process_btn.setEnabled(False)
-        self.status_label.setText("⏳ Przetwarzanie w toku...")
-        self.status_label.setStyleSheet("padding: 10px; background-color: #fff3cd; border-radius: 5px;")
+        # Plik wybrany ręcznie trzeba wskazać ponownie; propozycja zmieni się razem z zakresem dat
+        if not self.output_file_suggested:
+            self.output_file = ""
+            self.output_file_edit.clear()
 
-        # Uruchom w osobnym wątku
-        self.processing_thread = ProcessingThread(
+    def preview_file(self):
+        """Wzbogać pierwsze N wierszy wybranego pliku i pokaż je w tabeli"""
+        if not self.input_file or not Path(self.input_file).exists():
+            QMessageBox.warning(self, "Brak pliku", "Wybierz istniejący plik wejściowy!")
+            return
+
+        engine = self.get_engine()
+        if engine is None:
+            return
+
+        date_start, date_end = self.get_date_range()
+        self.preview_btn.setEnabled(False)
+        self.preview_thread = PreviewThread(
             self.input_file,
-            self.output_file,
             date_start,
-            date_end
+            date_end,
+            self.preview_rows_spin.value(),
+            engine
         )
-        self.processing_thread.finished.connect(self.on_processing_finished)
-        self.processing_thread.start()
+        self.preview_thread.finished.connect(self.on_preview_finished)
+        self.preview_running = True
+        self.preview_thread.start()
+
+    def on_preview_finished(self, success: bool, df, message: str):
+        """Callback po zakończeniu podglądu"""
+        self.preview_running = False
+        if self.closing:
+            self.continue_closing()
+            return
 
-    def on_processing_finished(self, success: bool, message: str):
-        """Callback po zakończeniu przetwarzania"""
-        self.process_btn.setEnabled(True)
+        self.preview_btn.setEnabled(True)
 
-        if success:
-            self.status_label.setText(f"✅ {message}")
+        if not success:
+            QMessageBox.critical(self, "Błąd", message)
+            return
+
+        self.preview_table.clear()
+        self.preview_table.setRowCount(len(df))
+        self.preview_table.setColumnCount(len(df.columns))
+        self.preview_table.setHorizontalHeaderLabels([str(column) for column in df.columns])
+        for row, values in enumerate(df.itertuples(index=False)):
+            for column, value in enumerate(values):
+                text = "" if pd.isna(value) else str(value)
+                self.preview_table.setItem(row, column, QTableWidgetItem(text))
+        self.preview_table.resizeColumnsToContents()
+        self.status_label.setText(f"🔍 {message}")
+
+    def add_files_to_queue(self):
+        """Dodaj wiele plików naraz - wyniki zapisywane obok jako *_enriched_<od>_<do>"""
+        file_names, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Wybierz pliki Excel",
+            "",
+            "Pliki Excel (*.xlsx *.xls)"
+        )
+        date_start, date_end = self.get_date_range()
+        skipped = []
+        for file_name in file_names:
+            output_file = suggest_output_file(file_name, date_start, date_end)
+            if self.is_output_pending(output_file):
+                skipped.append(Path(file_name).name)
+                continue
+            self.enqueue_job(file_name, output_file, date_start, date_end)
+
+        if skipped:
+            QMessageBox.warning(
+                self,
+                "Pominięte pliki",
+                f"Te pliki z zakresem {date_start} – {date_end} są już w kolejce:\n\n" + "\n".join(skipped)
+            )
+
+    def enqueue_job(self, input_file: str, output_file: str, date_start: str, date_end: str):
+        """Utwórz zadanie i przekaż je do puli wątków"""
+        if self.closing:
+            return
+
+        engine = self.get_engine()
+        if engine is None:
+            return
+
+        job = Job(self.next_job_id, input_file, output_file, date_start, date_end,
+                  append_only=self.append_only_check.isChecked())
+        self.next_job_id += 1
+        self.jobs[job.job_id] = job
+
+        runnable = ProcessingJob(job, engine, self.article_cache)
+        runnable.signals.started.connect(self.on_job_started)
+        runnable.signals.finished.connect(self.on_job_finished)
+        self.running_jobs[job.job_id] = runnable
+
+        self.refresh_queue_table()
+        self.thread_pool.start(runnable)
+
+    def on_job_started(self, job_id: int):
+        """Callback - zadanie pobrane przez wątek z puli"""
+        self.jobs[job_id].status = STATUS_RUNNING
+        self.refresh_queue_table()
+
+    def on_job_finished(self, job_id: int, success: bool, message: str, elapsed: float):
+        """Callback po zakończeniu zadania - błąd jednego nie wstrzymuje pozostałych"""
+        job = self.jobs[job_id]
+        job.status = STATUS_DONE if success else STATUS_FAILED
+        job.message = message
+        job.elapsed = elapsed
+        self.running_jobs.pop(job_id, None)
+        self.refresh_queue_table()
+
+        # Cache żyje tylko w obrębie jednego przebiegu kolejki - następny pobierze świeże dane
+        if not self.running_jobs:
+            self.article_cache.clear()
+
+        if self.closing:
+            self.continue_closing()
+
+    def clear_finished_jobs(self):
+        """Usuń z tabeli zadania zakończone (również z błędem)"""
+        self.jobs = {job_id: job for job_id, job in self.jobs.items() if not job.is_finished}
+        self.refresh_queue_table()
+
+    def refresh_queue_table(self):
+        """Odśwież tabelę kolejki i podsumowanie w pasku statusu"""
+        self.queue_table.setRowCount(len(self.jobs))
+        for row, job in enumerate(self.jobs.values()):
+            elapsed = f"{job.elapsed:.1f}" if job.elapsed is not None else ""
+            values = [
+                Path(job.input_file).name,
+                Path(job.output_file).name,
+                f"{job.date_start} – {job.date_end}",
+                job.status,
+                elapsed,
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setToolTip(job.message or job.input_file)
+                self.queue_table.setItem(row, column, item)
+
+        statuses = [job.status for job in self.jobs.values()]
+        queued = statuses.count(STATUS_QUEUED)
+        running = statuses.count(STATUS_RUNNING)
+        done = statuses.count(STATUS_DONE)
+        failed = statuses.count(STATUS_FAILED)
+
+        if queued or running:
+            self.status_label.setText(f"⏳ W toku: {running}, w kolejce: {queued}, "
+                                      f"zakończone: {done}, błędy: {failed}")
+            self.status_label.setStyleSheet("padding: 10px; background-color: #fff3cd; border-radius: 5px;")
+        elif failed:
+            self.status_label.setText(f"❌ Zakończone: {done}, błędy: {failed}")
+            self.status_label.setStyleSheet("padding: 10px; background-color: #f8d7da; border-radius: 5px;")
+        elif done:
+            self.status_label.setText(f"✅ Zakończone: {done}")
             self.status_label.setStyleSheet("padding: 10px; background-color: #d4edda; border-radius: 5px;")
-            QMessageBox.information(self, "Sukces", f"{message}\n\nPlik zapisany: {self.output_file}")
         else:
-            self.status_label.setText(f"❌ {message}")
-            self.status_label.setStyleSheet("padding: 10px; background-color: #f8d7da; border-radius: 5px;")
-            QMessageBox.critical(self, "Błąd", message)
+            self.status_label.setText("Gotowy do pracy")
+            self.status_label.setStyleSheet("padding: 10px; background-color: #e8f5e9; border-radius: 5px;")
+
+    def show_closing_status(self):
+        """Status podczas oczekiwania na zakończenie trwających zadań i podglądu przed zamknięciem"""
+        waiting = []
+        if self.running_jobs:
+            waiting.append(f"zadań: {len(self.running_jobs)}")
+        if self.preview_running:
+            waiting.append("podglądu")
+        self.status_label.setText(f"⏳ Oczekiwanie na zakończenie {', '.join(waiting)} - "
+                                  f"okno zamknie się automatycznie")
+        self.status_label.setStyleSheet("padding: 10px; background-color: #fff3cd; border-radius: 5px;")
 
+    def continue_closing(self):
+        """Zamknij okno, gdy nic już nie działa - w przeciwnym razie odśwież status oczekiwania"""
+        if self.running_jobs or self.preview_running:
+            self.show_closing_status()
+        else:
+            self.close()
+
+    def cancel_queued_jobs(self):
+        """Usuń z puli zadania, które jeszcze nie wystartowały"""
+        for job_id, runnable in list(self.running_jobs.items()):
+            if self.thread_pool.tryTake(runnable):
+                self.running_jobs.pop(job_id)
+                self.jobs.pop(job_id, None)
+        self.refresh_queue_table()
+
+    def closeEvent(self, event):
+        """Przy zamknięciu: potwierdź, porzuć zadania oczekujące i zamknij okno po zakończeniu trwających"""
+        if self.running_jobs and not self.closing:
+            answer = QMessageBox.question(
+                self,
+                "Zadania w toku",
+                f"Nie zakończono zadań: {len(self.running_jobs)}.\n\n"
+                "Oczekujące zadania zostaną anulowane, a okno zamknie się "
+                "po zakończeniu trwających. Zamknąć?"
+            )
+            if answer != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+
+            self.cancel_queued_jobs()
+
+        if self.running_jobs or self.preview_running:
+            # Nie blokujemy wątku GUI - on_job_finished / on_preview_finished zamkną okno
+            self.closing = True
+            self.process_btn.setEnabled(False)
+            self.add_files_btn.setEnabled(False)
+            self.preview_btn.setEnabled(False)
+            self.show_closing_status()
+            event.ignore()
+            return
 
+        if self.preview_thread is not None:
+            self.preview_thread.wait()  # Wynik już wysłany - czekamy tylko na wyjście z run()
+        if self.engine is not None:
+            self.engine.dispose()
+        super().closeEvent(event)